@@ -7,12 +7,16 @@ Uses 70% of venue capacity as expected passengers
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import asyncio
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Optional
+import numpy as np
 import pandas as pd
-import json
-import requests
-from geopy.distance import geodesic
+import orjson
+import httpx
+from numba import njit
+from scipy.spatial import cKDTree
 import uvicorn
 
 app = FastAPI(title="Transit Demand Prediction API - Direct Capacity")
@@ -78,21 +82,66 @@ events_df = None
 stations_df = None
 places_dict = {}
 
+# Default nearby-stop distributions per place_id, built once at startup
+venue_demand_cache = {}
+
+# First performance of each event, keyed by event_id, for O(1) lookups
+events_by_id = {}
+sample_event_ids = []
+
+# Station columns cached as NumPy arrays for vectorized distance lookups
+stations_lat = np.empty(0, dtype=np.float64)
+stations_lon = np.empty(0, dtype=np.float64)
+stations_lat_rad = np.empty(0, dtype=np.float64)
+stations_lon_rad = np.empty(0, dtype=np.float64)
+stations_name = np.empty(0, dtype=object)
+stations_locality = np.empty(0, dtype=object)
+stations_services = np.empty(0, dtype=object)
+
+# KD-tree over stops projected onto a local equirectangular plane (metres)
+stations_tree = None
+projection_cos_lat = 1.0
+
+# int32 sentinel for venues without capacity data
+MISSING_CAPACITY = np.iinfo(np.int32).min
+DEFAULT_MAX_DISTANCE_KM = 0.3
+# Upper bound on the max_distance query param, which also bounds cached payloads
+MAX_DISTANCE_CAP_KM = 1.0
+EARTH_RADIUS_KM = 6371.0
+METERS_PER_DEGREE_LAT = 110540.0
+METERS_PER_DEGREE_LON = 111320.0
+# Pad tree queries to absorb projection error; haversine trims the extras
+TREE_RADIUS_MARGIN = 1.05
+
 
 @app.on_event("startup")
 async def load_data():
     """Load events and bus stops data when API starts"""
-    global events_df, stations_df, places_dict
+    global events_df, stations_df, places_dict, events_by_id, sample_event_ids
+    global venue_demand_cache
+    global stations_lat, stations_lon, stations_lat_rad, stations_lon_rad
+    global stations_name, stations_locality, stations_services
+    global stations_tree, projection_cos_lat
+
+    # Cached responses are only valid for the data they were built from
+    compute_event_demand.cache_clear()
 
     print("=" * 70)
     print("LOADING DATA - DIRECT CAPACITY MODEL")
     print("=" * 70)
 
-    # Load events data
-    with open("../public/thistle_data.json", "r") as f:
-        data = json.load(f)
+    # Start the TfE fetch now so the round-trip overlaps with reading the events
+    print("Fetching bus stops from TfE API in the background...")
+    tfe_task = asyncio.create_task(fetch_tfe_stops())
+
+    # Load events data off the event loop so the fetch can progress
+    data = await asyncio.to_thread(read_json_file, "../public/thistle_data.json")
+
+    # Create places lookup WITH CAPACITY, plus columnar arrays indexed by place_idx
+    place_idx = {}
+    place_name_col, place_town_col, place_address_col = [], [], []
+    place_lat_col, place_lon_col, place_cap_col = [], [], []
 
-    # Create places lookup WITH CAPACITY
     for place in data["places"]:
         place_id = place["place_id"]
         lat, lon = None, None
@@ -120,6 +169,13 @@ async def load_data():
                 except:
                     capacity = None
 
+            # Non-integer values and anything outside int32 (or equal to the
+            # sentinel) count as missing, so the int32 capacity column can hold it
+            if not isinstance(capacity, int) or not (
+                MISSING_CAPACITY < capacity <= np.iinfo(np.int32).max
+            ):
+                capacity = None
+
         places_dict[place_id] = {
             "name": place.get("name", ""),
             "town": place.get("town", ""),
@@ -129,14 +185,34 @@ async def load_data():
             "capacity": capacity,
         }
 
+        place_idx[place_id] = len(place_name_col)
+        place_name_col.append(place.get("name", ""))
+        place_town_col.append(place.get("town", ""))
+        place_address_col.append(place.get("address", ""))
+        place_lat_col.append(np.nan if lat is None else lat)
+        place_lon_col.append(np.nan if lon is None else lon)
+        place_cap_col.append(MISSING_CAPACITY if capacity is None else capacity)
+
+    # Trailing sentinel row for schedules whose place_id is unknown
+    missing_place = len(place_name_col)
+    place_name_arr = np.array(place_name_col + [""], dtype=object)
+    place_town_arr = np.array(place_town_col + [""], dtype=object)
+    place_address_arr = np.array(place_address_col + [""], dtype=object)
+    place_lat_arr = np.array(place_lat_col + [np.nan], dtype=np.float64)
+    place_lon_arr = np.array(place_lon_col + [np.nan], dtype=np.float64)
+    place_cap_arr = np.array(place_cap_col + [MISSING_CAPACITY], dtype=np.int32)
+
     print(f"Loaded {len(places_dict)} venues")
     venues_with_capacity = sum(
         1 for p in places_dict.values() if p["capacity"] is not None
     )
     print(f"  Venues with capacity data: {venues_with_capacity}")
 
-    # Flatten events
-    events_list = []
+    # Flatten events into parallel column lists (one entry per performance);
+    # venue fields are gathered from the place arrays afterwards
+    event_id_col, event_name_col, event_category_col = [], [], []
+    place_id_col, place_idx_col = [], []
+    performance_ts_col, duration_col, min_price_col = [], [], []
 
     for event in data["events"]:
         original_event_id = event.get("event_id")
@@ -144,8 +220,12 @@ async def load_data():
         if original_event_id is None:
             continue
 
+        event_name = event["name"]
+        event_category = event.get("category", "")
+
         for schedule in event["schedules"]:
-            place = places_dict.get(schedule["place_id"], {})
+            place_id = schedule["place_id"]
+            idx = place_idx.get(place_id, missing_place)
 
             for performance in schedule["performances"]:
                 min_price = next(
@@ -157,52 +237,136 @@ async def load_data():
                     None,
                 )
 
-                events_list.append(
-                    {
-                        "event_id": original_event_id,
-                        "event_name": event["name"],
-                        "event_category": event.get("category", ""),
-                        "place_id": schedule["place_id"],
-                        "venue_name": place.get("name", ""),
-                        "venue_town": place.get("town", ""),
-                        "venue_address": place.get("address", ""),
-                        "venue_capacity": place.get("capacity"),
-                        "venue_lat": place.get("latitude"),
-                        "venue_lon": place.get("longitude"),
-                        "performance_ts": performance["ts"],
-                        "duration": performance.get("duration", 120),
-                        "min_price": min_price,
-                    }
-                )
-
-    events_df = pd.DataFrame(events_list)
+                event_id_col.append(original_event_id)
+                event_name_col.append(event_name)
+                event_category_col.append(event_category)
+                place_id_col.append(place_id)
+                place_idx_col.append(idx)
+                performance_ts_col.append(performance["ts"])
+                duration_col.append(performance.get("duration", 120))
+                min_price_col.append(min_price)
+
+    place_idx_arr = np.array(place_idx_col, dtype=np.intp)
+    cap_i32 = place_cap_arr[place_idx_arr]
+
+    events_df = pd.DataFrame(
+        {
+            "event_id": event_id_col,
+            "event_name": event_name_col,
+            "event_category": event_category_col,
+            "place_id": place_id_col,
+            "venue_name": place_name_arr[place_idx_arr],
+            "venue_town": place_town_arr[place_idx_arr],
+            "venue_address": place_address_arr[place_idx_arr],
+            "venue_capacity": np.where(cap_i32 != MISSING_CAPACITY, cap_i32, np.nan),
+            "venue_lat": place_lat_arr[place_idx_arr],
+            "venue_lon": place_lon_arr[place_idx_arr],
+            "performance_ts": performance_ts_col,
+            "duration": duration_col,
+            "min_price": min_price_col,
+            # int32 capacity with a MISSING_CAPACITY sentinel, for filtering
+            "_cap_i32": cap_i32,
+        }
+    )
 
     # Parse timestamps
     events_df["datetime"] = pd.to_datetime(
         events_df["performance_ts"], format="mixed", errors="coerce", utc=True
     ).dt.tz_localize(None)
 
-    events_df = events_df[events_df["datetime"].notna()]
+    events_df = events_df[events_df["datetime"].notna()].reset_index(drop=True)
+
+    # Precompute NaN-free, native-Python columns so endpoints can read them as-is;
+    # the text columns repeat across performances, so store them as categoricals
+    for col in [
+        "event_name",
+        "event_category",
+        "venue_name",
+        "venue_town",
+        "venue_address",
+    ]:
+        events_df[col] = events_df[col].fillna("").astype(str).astype("category")
+    events_df["venue_capacity_py"] = (
+        events_df["venue_capacity"]
+        .astype("Int64")
+        .astype(object)
+        .where(events_df["venue_capacity"].notna(), None)
+    )
+    for col in ["min_price", "venue_lat", "venue_lon"]:
+        events_df[f"{col}_py"] = (
+            events_df[col].astype(object).where(events_df[col].notna(), None)
+        )
+    events_df["datetime_str"] = events_df["datetime"].dt.strftime("%Y-%m-%d %H:%M")
+    # Days since the epoch, for exact-date filtering without per-row dates
+    events_df["_date_int"] = (
+        events_df["datetime"].to_numpy("datetime64[D]").astype(np.int64)
+    )
+
+    # Lowercased copies of the searchable text columns
+    for col in ["event_name", "venue_name", "venue_town", "event_category"]:
+        events_df[f"_{col}_lc"] = events_df[col].str.lower()
+
+    first_performances = events_df.drop_duplicates("event_id")
+    events_by_id = dict(
+        zip(
+            first_performances["event_id"].astype(int),
+            first_performances.to_dict("records"),
+        )
+    )
+    sample_event_ids = sorted(events_by_id)[:20]
 
     # Load bus stops
-    print("\nFetching bus stops from TfE API...")
+    print("\nWaiting for bus stops from TfE API...")
     try:
-        response = requests.get("https://tfe-opendata.com/api/v1/stops", timeout=10)
-        stops_data = response.json()
+        stops_data = await tfe_task
 
+        # Services stay as raw lists; only matched stops get joined to a string
         stations_df = pd.DataFrame(stops_data["stops"])
-        stations_df["destinations"] = stations_df["destinations"].apply(
-            lambda x: ", ".join(x) if isinstance(x, list) else ""
-        )
-        stations_df["services"] = stations_df["services"].apply(
-            lambda x: ", ".join(x) if isinstance(x, list) else ""
+
+        # Drop stops without usable coordinates; the KD-tree needs finite input
+        for col in ["latitude", "longitude"]:
+            stations_df[col] = pd.to_numeric(stations_df[col], errors="coerce")
+        has_coords = np.isfinite(stations_df["latitude"]) & np.isfinite(
+            stations_df["longitude"]
         )
+        if not has_coords.all():
+            print(f"  Skipping {int((~has_coords).sum())} stops without coordinates")
+        stations_df = stations_df[has_coords].reset_index(drop=True)
+
+        # Stop name/locality are declared str in the response; normalize them here
+        for col in ["name", "locality"]:
+            if col in stations_df:
+                stations_df[col] = stations_df[col].fillna("").astype(str)
+            else:
+                stations_df[col] = ""
 
         print(f"Loaded {len(stations_df)} bus stops")
     except Exception as e:
         print(f"Warning: Could not load bus stops: {e}")
         stations_df = pd.DataFrame()
 
+    if not stations_df.empty:
+        stations_lat = stations_df["latitude"].to_numpy(np.float64)
+        stations_lon = stations_df["longitude"].to_numpy(np.float64)
+        stations_lat_rad = np.radians(stations_lat)
+        stations_lon_rad = np.radians(stations_lon)
+        stations_name = stations_df["name"].to_numpy(object)
+        stations_locality = stations_df["locality"].to_numpy(object)
+        stations_services = stations_df["services"].to_numpy(object)
+        projection_cos_lat = float(np.cos(np.radians(stations_lat.mean())))
+        stations_tree = cKDTree(project_to_plane(stations_lat, stations_lon))
+
+    # Pre-materialize the default-radius distribution for every venue in use
+    venue_demand_cache = {}
+    for place_id in events_df["place_id"].unique():
+        place = places_dict.get(place_id)
+        if place is None or place["latitude"] is None or place["longitude"] is None:
+            continue
+        venue_demand_cache[place_id] = distribute_passengers_to_stops(
+            place["latitude"], place["longitude"], place["capacity"]
+        )
+    print(f"Precomputed stop demand for {len(venue_demand_cache)} venues")
+
     print(f"\nLoaded {len(events_df)} performances")
     print(
         f"Date range: {events_df['datetime'].min().date()} to {events_df['datetime'].max().date()}"
@@ -230,32 +394,63 @@ async def load_data():
 # ===========================================================================
 
 
-def safe_float(value) -> Optional[float]:
-    """Convert value to float, handling NaN"""
-    if pd.isna(value):
-        return None
-    return float(value)
+def read_json_file(path: str) -> dict:
+    """Read and parse a JSON file with orjson"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
 
+async def fetch_tfe_stops() -> dict:
+    """Fetch the raw bus stops payload from the TfE API"""
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.get("https://tfe-opendata.com/api/v1/stops")
+    return orjson.loads(response.content)
 
-def safe_int(value) -> Optional[int]:
-    """Convert value to int, handling NaN"""
-    if pd.isna(value):
-        return None
-    return int(value)
 
+def project_to_plane(lat, lon) -> np.ndarray:
+    """Project lat/lon degrees onto the local equirectangular plane in metres"""
+    return np.column_stack(
+        [
+            np.asarray(lon) * projection_cos_lat * METERS_PER_DEGREE_LON,
+            np.asarray(lat) * METERS_PER_DEGREE_LAT,
+        ]
+    )
+
+
+@njit(cache=True, fastmath=True)
+def haversine_km(lat1_rad, lon1_rad, lat2_rad, lon2_rad):
+    """Great-circle distance in km on a spherical Earth (scalars or arrays)"""
+    dlat = lat2_rad - lat1_rad
+    dlon = lon2_rad - lon1_rad
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
 
-def safe_str(value) -> str:
-    """Convert value to string, handling NaN"""
-    if pd.isna(value):
-        return ""
-    return str(value)
+
+@njit(cache=True, fastmath=True)
+def compute_distances_and_weights(lat_rad_arr, lon_rad_arr, v_lat, v_lon, max_km):
+    """Haversine distance (km) and 1 / (1 + 3d) weight per stop (0 if out of range)"""
+    n = lat_rad_arr.shape[0]
+    distances = np.empty(n, dtype=np.float64)
+    weights = np.zeros(n, dtype=np.float64)
+
+    for i in range(n):
+        d = haversine_km(v_lat, v_lon, lat_rad_arr[i], lon_rad_arr[i])
+        distances[i] = d
+        if d > max_km:
+            continue
+        weights[i] = 1 / (1 + d * 3)
+
+    return distances, weights
 
 
 def distribute_passengers_to_stops(
     venue_lat: float,
     venue_lon: float,
     venue_capacity: Optional[int],
-    max_distance_km: float = 0.3,
+    max_distance_km: float = DEFAULT_MAX_DISTANCE_KM,
 ):
     """
     Distribute 70% of venue capacity across nearby bus stops
@@ -271,50 +466,62 @@ def distribute_passengers_to_stops(
     else:
         expected_attendance = int(venue_capacity * 0.7)
 
-    # Find nearby stops
-    nearby = []
-    venue_coords = (venue_lat, venue_lon)
-
-    for idx, station in stations_df.iterrows():
-        station_coords = (station["latitude"], station["longitude"])
-        distance_km = geodesic(venue_coords, station_coords).km
-
-        if distance_km <= max_distance_km:
-            # Calculate distance weight (closer = higher weight)
-            distance_weight = 1 / (1 + distance_km * 3)
-
-            nearby.append(
-                {
-                    "stop_name": station["name"],
-                    "locality": station["locality"],
-                    "latitude": station["latitude"],
-                    "longitude": station["longitude"],
-                    "distance_meters": int(distance_km * 1000),
-                    "distance_km": distance_km,
-                    "distance_weight": distance_weight,
-                    "services": station.get("services", ""),
-                }
-            )
-
-    if not nearby:
-        return [], expected_attendance
+    # Radius query on the KD-tree; sorted indices keep original stop order
+    venue_xy = project_to_plane(venue_lat, venue_lon)[0]
+    candidates = np.asarray(
+        stations_tree.query_ball_point(
+            venue_xy, r=max_distance_km * 1000 * TREE_RADIUS_MARGIN, return_sorted=True
+        ),
+        dtype=np.intp,
+    )
 
-    # Calculate total weight
-    total_weight = sum(stop["distance_weight"] for stop in nearby)
+    # Exact distances and weights (closer = higher weight) for the tree hits
+    d_km, weights = compute_distances_and_weights(
+        stations_lat_rad[candidates],
+        stations_lon_rad[candidates],
+        np.radians(venue_lat),
+        np.radians(venue_lon),
+        max_distance_km,
+    )
 
-    # Distribute passengers proportionally to each stop
-    for stop in nearby:
-        # Percentage of total weight
-        weight_percentage = stop["distance_weight"] / total_weight
+    hit = np.flatnonzero(weights > 0)
+    if len(hit) == 0:
+        return [], expected_attendance
 
-        # Assign passengers based on weight
-        stop["expected_passengers"] = int(expected_attendance * weight_percentage)
-        stop["percentage_of_total"] = round(weight_percentage * 100, 1)
+    # Normalize weights and split passengers proportionally in one pass
+    share = weights[hit] / weights[hit].sum()
+    passengers = (expected_attendance * share).astype(np.int32)
+
+    # Sort by expected passengers (highest first), ties keep stop order
+    order = np.argsort(-passengers, kind="stable")
+    hit = hit[order]
+    share = share[order]
+    passengers = passengers[order]
+
+    # Gather each field for the in-range stops with one fancy-index per array
+    idx = candidates[hit]
+    hit_km = d_km[hit]
+
+    fields = {
+        "stop_name": stations_name[idx].tolist(),
+        "locality": stations_locality[idx].tolist(),
+        "latitude": stations_lat[idx].tolist(),
+        "longitude": stations_lon[idx].tolist(),
+        "distance_meters": (hit_km * 1000).astype(np.int32).tolist(),
+        "distance_km": hit_km.tolist(),
+        "distance_weight": weights[hit].tolist(),
+        "services": [
+            ", ".join(map(str, services)) if isinstance(services, list) else ""
+            for services in stations_services[idx]
+        ],
+        "expected_passengers": passengers.tolist(),
+        "percentage_of_total": np.round(share * 100, 1).tolist(),
+    }
 
-    # Sort by expected passengers (highest first)
-    nearby_sorted = sorted(nearby, key=lambda x: x["expected_passengers"], reverse=True)
+    # Pack records by iterating only over the (few) hits
+    nearby = [dict(zip(fields, values)) for values in zip(*fields.values())]
 
-    return nearby_sorted, expected_attendance
+    return nearby, expected_attendance
 
 
 # ===========================================================================
@@ -333,43 +540,71 @@ async def root():
     }
 
 
-@app.get("/event/{event_id}", response_model=EventWithDemand)
-async def get_event_with_demand(
-    event_id: int,
-    max_distance: float = Query(0.3, description="Max distance to bus stops in km"),
-):
-    """Get event with capacity-based passenger distribution"""
+EVENT_LIST_COLUMNS = [
+    "event_id",
+    "event_name",
+    "event_category",
+    "venue_name",
+    "venue_town",
+    "venue_capacity_py",
+    "datetime_str",
+]
+
+
+def build_event_list_items(events: pd.DataFrame) -> List[EventListItem]:
+    """Build EventListItems from a column slice instead of per-row Series
+
+    Values come from our own precomputed columns, so validation is skipped.
+    """
+    return [
+        EventListItem.model_construct(
+            event_id=int(row[0]),
+            event_name=row[1],
+            event_category=row[2],
+            venue_name=row[3],
+            venue_town=row[4],
+            venue_capacity=row[5],
+            performance_datetime=row[6],
+        )
+        for row in events[EVENT_LIST_COLUMNS].to_numpy()
+    ]
+
 
-    event = events_df[events_df["event_id"] == event_id]
+@lru_cache(maxsize=256)
+def compute_event_demand(event_id: int, max_distance: float) -> dict:
+    """Build the /event payload; cached since events and stops are static"""
 
-    if len(event) == 0:
-        available_ids = list(sorted(events_df["event_id"].unique())[:20])
+    event = events_by_id.get(event_id)
+
+    if event is None:
         raise HTTPException(
             status_code=404,
-            detail=f"Event ID {event_id} not found. Sample IDs: {available_ids}",
+            detail=f"Event ID {event_id} not found. Sample IDs: {sample_event_ids}",
         )
 
-    event = event.iloc[0]
-
-    # Convert NaN values
-    min_price_value = safe_float(event["min_price"])
-    venue_address = safe_str(event["venue_address"])
-    venue_capacity = safe_int(event["venue_capacity"])
-    venue_lat = safe_float(event["venue_lat"])
-    venue_lon = safe_float(event["venue_lon"])
+    venue_capacity = event["venue_capacity_py"]
+    venue_lat = event["venue_lat_py"]
+    venue_lon = event["venue_lon_py"]
 
     if venue_lat is None or venue_lon is None:
         raise HTTPException(
             status_code=400, detail=f"Event {event_id} venue has no coordinates"
         )
 
-    # Distribute passengers to nearby stops
-    nearby_stops, expected_attendance = distribute_passengers_to_stops(
-        venue_lat, venue_lon, venue_capacity, max_distance
-    )
+    # Distribute passengers to nearby stops, reusing the startup result if we can
+    cached = None
+    if max_distance == DEFAULT_MAX_DISTANCE_KM:
+        cached = venue_demand_cache.get(event["place_id"])
+    if cached is not None:
+        nearby_stops, expected_attendance = cached
+    else:
+        nearby_stops, expected_attendance = distribute_passengers_to_stops(
+            venue_lat, venue_lon, venue_capacity, max_distance
+        )
 
+    # Trusted in-process values, so skip Pydantic validation
     stops_list = [
-        NearbyStopWithDemand(
+        NearbyStopWithDemand.model_construct(
             stop_name=stop["stop_name"],
             stop_locality=stop["locality"],
             latitude=stop["latitude"],
@@ -384,27 +619,43 @@ async def get_event_with_demand(
 
     total_passengers = sum(stop["expected_passengers"] for stop in nearby_stops)
 
-    return EventWithDemand(
-        event_id=int(event["event_id"]),
-        event_name=event["event_name"],
-        event_category=event["event_category"],
-        venue_name=safe_str(event["venue_name"]),
-        venue_town=safe_str(event["venue_town"]),
-        venue_address=venue_address,
-        venue_capacity=venue_capacity,
-        expected_attendance=expected_attendance,
-        venue_lat=venue_lat,
-        venue_lon=venue_lon,
-        performance_datetime=event["datetime"].strftime("%Y-%m-%d %H:%M"),
-        min_price=min_price_value,
-        nearby_stops=stops_list,
-        total_stops_within_300m=len(stops_list),
-        total_expected_passengers=total_passengers,
+    return {
+        "event_id": int(event["event_id"]),
+        "event_name": event["event_name"],
+        "event_category": event["event_category"],
+        "venue_name": event["venue_name"],
+        "venue_town": event["venue_town"],
+        "venue_address": event["venue_address"],
+        "venue_capacity": venue_capacity,
+        "expected_attendance": expected_attendance,
+        "venue_lat": venue_lat,
+        "venue_lon": venue_lon,
+        "performance_datetime": event["datetime_str"],
+        "min_price": event["min_price_py"],
+        "nearby_stops": stops_list,
+        "total_stops_within_300m": len(stops_list),
+        "total_expected_passengers": total_passengers,
+    }
+
+
+@app.get("/event/{event_id}", response_model=EventWithDemand)
+def get_event_with_demand(
+    event_id: int,
+    max_distance: float = Query(
+        DEFAULT_MAX_DISTANCE_KM,
+        gt=0,
+        le=MAX_DISTANCE_CAP_KM,
+        description="Max distance to bus stops in km",
+    ),
+):
+    """Get event with capacity-based passenger distribution"""
+    return EventWithDemand.model_construct(
+        **compute_event_demand(event_id, round(max_distance, 4))
     )
 
 
 @app.get("/events/search", response_model=List[EventListItem])
-async def search_events(
+def search_events(
     query: str = Query(None),
     venue: str = Query(None),
     town: str = Query(None),
@@ -414,85 +665,68 @@ async def search_events(
     limit: int = Query(50),
 ):
     """Search events with capacity filter"""
-    filtered = events_df.copy()
+    mask = np.ones(len(events_df), dtype=bool)
 
     if query:
-        filtered = filtered[
-            filtered["event_name"].str.contains(query, case=False, na=False)
-            | filtered["venue_name"].str.contains(query, case=False, na=False)
-        ]
+        q = query.lower()
+        mask &= (
+            events_df["_event_name_lc"].str.contains(q, na=False, regex=False)
+            | events_df["_venue_name_lc"].str.contains(q, na=False, regex=False)
+        ).to_numpy()
 
     if venue:
-        filtered = filtered[
-            filtered["venue_name"].str.contains(venue, case=False, na=False)
-        ]
+        mask &= (
+            events_df["_venue_name_lc"]
+            .str.contains(venue.lower(), na=False, regex=False)
+            .to_numpy()
+        )
 
     if town:
-        filtered = filtered[
-            filtered["venue_town"].str.contains(town, case=False, na=False)
-        ]
+        mask &= (
+            events_df["_venue_town_lc"]
+            .str.contains(town.lower(), na=False, regex=False)
+            .to_numpy()
+        )
 
     if category:
-        filtered = filtered[
-            filtered["event_category"].str.contains(category, case=False, na=False)
-        ]
+        mask &= (
+            events_df["_event_category_lc"]
+            .str.contains(category.lower(), na=False, regex=False)
+            .to_numpy()
+        )
 
     if date:
         try:
             target_date = datetime.strptime(date, "%Y-%m-%d").date()
-            filtered = filtered[filtered["datetime"].dt.date == target_date]
+            target_int = np.datetime64(target_date, "D").astype(np.int64)
+            mask &= events_df["_date_int"].to_numpy() == target_int
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format")
 
     if min_capacity:
-        filtered = filtered[filtered["venue_capacity"] >= min_capacity]
+        # Exclude missing capacities explicitly so no threshold can match them
+        cap = events_df["_cap_i32"].to_numpy()
+        mask &= (cap != MISSING_CAPACITY) & (cap >= min_capacity)
 
-    filtered = filtered.head(limit)
+    # Only materialize the rows we return
+    filtered = events_df.iloc[np.flatnonzero(mask)[:limit]]
 
     if len(filtered) == 0:
         return []
 
-    results = []
-    for _, event in filtered.iterrows():
-        results.append(
-            EventListItem(
-                event_id=int(event["event_id"]),
-                event_name=event["event_name"],
-                event_category=event["event_category"],
-                venue_name=safe_str(event["venue_name"]),
-                venue_town=safe_str(event["venue_town"]),
-                venue_capacity=safe_int(event["venue_capacity"]),
-                performance_datetime=event["datetime"].strftime("%Y-%m-%d %H:%M"),
-            )
-        )
-
-    return results
+    return build_event_list_items(filtered)
 
 
 @app.get("/events/list", response_model=List[EventListItem])
-async def list_events(skip: int = Query(0), limit: int = Query(50)):
+def list_events(skip: int = Query(0), limit: int = Query(50)):
     """List all events"""
     events = events_df.iloc[skip : skip + limit]
 
-    results = []
-    for _, event in events.iterrows():
-        results.append(
-            EventListItem(
-                event_id=int(event["event_id"]),
-                event_name=event["event_name"],
-                event_category=event["event_category"],
-                venue_name=safe_str(event["venue_name"]),
-                venue_town=safe_str(event["venue_town"]),
-                venue_capacity=safe_int(event["venue_capacity"]),
-                performance_datetime=event["datetime"].strftime("%Y-%m-%d %H:%M"),
-            )
-        )
-
-    return results
+    return build_event_list_items(events)
 
 
 @app.get("/stats")
-async def get_stats():
+def get_stats():
     """Get dataset statistics"""
     capacity_stats = {}
     if events_df["venue_capacity"].notna().any():